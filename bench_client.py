@@ -0,0 +1,280 @@
+"""Benchmark per-step client-side cost by replaying the features against an in-memory fake API."""
+import argparse
+import contextlib
+import io
+import json
+import os
+import time
+import tracemalloc
+import types
+from unittest import mock
+from urllib.parse import urlsplit
+
+import requests
+from behave.parser import parse_file
+from behave.runner_util import exec_file
+from behave.step_registry import registry
+
+from trace_format import percentile
+
+STEPS_DIR = "steps"
+FEATURE_DIR = "features"
+
+# A realistically sized description so list responses and JSON decoding do real work
+FILLER_DESCRIPTION = "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 4
+
+
+class FakeApi:
+    """In-memory stand-in for the todo manager REST API used by the features."""
+
+    def __init__(self, seed_items=0):
+        self.seed_items = seed_items
+        self.reset()
+
+    def reset(self):
+        self.next_id = 1
+        self.todos = {}
+        self.projects = {}
+        for i in range(self.seed_items):
+            self.add_todo({"title": f"Seed Todo {i}", "description": FILLER_DESCRIPTION})
+            self.add_project({"title": f"Seed Project {i}", "description": FILLER_DESCRIPTION})
+
+    def new_id(self):
+        self.next_id += 1
+        return str(self.next_id - 1)
+
+    def add_todo(self, payload):
+        todo = {"id": self.new_id(), "title": payload["title"], "doneStatus": "false",
+                "description": payload.get("description", ""), "tasksof": [], "categories": []}
+        self.todos[todo["id"]] = todo
+        return todo
+
+    def add_project(self, payload):
+        project = {"id": self.new_id(), "title": payload.get("title", ""), "completed": "false",
+                   "active": "false", "description": payload.get("description", ""), "tasks": [], "categories": []}
+        self.projects[project["id"]] = project
+        return project
+
+    def handle(self, method, path, payload):
+        """Return (status, body) for a request, mimicking the real API's responses."""
+        parts = [p for p in path.split("/") if p]
+        collection, rest = parts[0], parts[1:]
+        store = self.todos if collection == "todos" else self.projects
+
+        if not rest:
+            if method == "GET":
+                return 200, {collection: list(store.values())}
+            if method == "DELETE":
+                store.clear()
+                return 200, None
+            if collection == "todos":
+                if "title" not in payload:
+                    return 400, {"errorMessages": ["title : field is mandatory"]}
+                if not isinstance(payload.get("description", ""), str):
+                    return 400, {"errorMessages": ["Failed Validation: description should be STRING"]}
+                return 201, self.add_todo(payload)
+            return 201, self.add_project(payload)
+
+        item = store.get(rest[0])
+        if item is None:
+            if len(rest) > 1:
+                return 404, {"errorMessages": [f"Could not find parent thing for relationship {path.strip('/')}"]}
+            return 404, {"errorMessages": [f"Could not find an instance with {path.strip('/')}"]}
+
+        if len(rest) == 1:
+            if method == "GET":
+                return 200, {collection: [item]}
+            if method == "DELETE":
+                del store[item["id"]]
+                return 200, None
+            unknown = [key for key in payload if key not in item]
+            if unknown:
+                return 400, {"errorMessages": [f"Could not find field: {unknown[0]}"]}
+            item.update(payload)
+            return 200, item
+
+        relation = rest[1]
+        if len(rest) == 3:
+            links = item.get(relation, [])
+            if not any(link["id"] == rest[2] for link in links):
+                return 404, {"errorMessages": [f"Could not find any instances with {path.strip('/')}"]}
+            item[relation] = [link for link in links if link["id"] != rest[2]]
+            return 200, None
+        if method == "GET":
+            if relation == "tasksof":
+                return 200, {"projects": [self.projects[link["id"]] for link in item["tasksof"] if link["id"] in self.projects]}
+            return 200, {relation: item.get(relation, [])}
+        if relation == "tasksof":
+            if payload.get("id") not in self.projects:
+                return 404, {"errorMessages": ["Could not find thing matching value for id"]}
+            item["tasksof"].append({"id": payload["id"]})
+            return 201, None
+        child = self.add_todo(payload) if relation == "tasks" else {"id": self.new_id(), "title": payload.get("title", "")}
+        item.setdefault(relation, []).append({"id": child["id"]})
+        return 201, child
+
+
+class MockTransport(requests.adapters.BaseAdapter):
+    """requests adapter that answers from a FakeApi and times the fake server itself."""
+
+    def __init__(self, api):
+        super().__init__()
+        self.api = api
+        self.server_seconds = 0.0
+
+    def send(self, request, **kwargs):
+        started = time.process_time()
+        payload = json.loads(request.body) if request.body else {}
+        status, body = self.api.handle(request.method, urlsplit(request.url).path, payload)
+
+        response = requests.models.Response()
+        response.status_code = status
+        response.headers["Content-Type"] = "application/json"
+        response._content = json.dumps(body).encode() if body is not None else b""
+        response.encoding = "utf-8"
+        response.url = request.url
+        response.request = request
+        self.server_seconds += time.process_time() - started
+        return response
+
+    def close(self):
+        pass
+
+
+def load_step_definitions(steps_dir=STEPS_DIR):
+    """Register the step modules with behave's registry, the way behave itself does."""
+    for name in sorted(os.listdir(steps_dir)):
+        if name.endswith(".py"):
+            exec_file(os.path.join(steps_dir, name))
+
+
+def collect_scenarios(feature_dir=FEATURE_DIR):
+    """Parse every feature file and return its scenarios with outlines expanded."""
+    scenarios = []
+    for root, _, files in os.walk(feature_dir):
+        for name in sorted(files):
+            if name.endswith(".feature"):
+                feature = parse_file(os.path.join(root, name))
+                scenarios.extend(feature.walk_scenarios())
+    return scenarios
+
+
+def call_step(match, context):
+    """Call a matched step function directly (Match.run needs a full behave Context)."""
+    args = [arg.value for arg in match.arguments if arg.name is None]
+    kwargs = {arg.name: arg.value for arg in match.arguments if arg.name is not None}
+    match.func(context, *args, **kwargs)
+
+
+def new_stats():
+    return {"calls": 0, "failures": 0, "match_s": 0.0, "cpu_s": [], "peak_bytes": 0}
+
+
+def run_scenario(scenario, api, transport, stats, trace_memory):
+    """Run all of one scenario's steps in order, accumulating per-step client-side cost."""
+    api.reset()
+    context = types.SimpleNamespace()
+    for step in scenario.all_steps:
+        clock = time.perf_counter()
+        match = registry.find_match(step)
+        matched = time.perf_counter() - clock
+        key = match.location if match else f"undefined: {step.step_type} {step.name}"
+        entry = stats.setdefault(str(key), new_stats())
+        entry["name"] = match.func.__name__ if match else "-"
+        if match is None:
+            continue
+
+        server_before = transport.server_seconds
+        if trace_memory:
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+        cpu = time.process_time()
+        failed = False
+        try:
+            call_step(match, context)
+        except Exception:
+            # Assertions may not hold against the fake API; unlike behave, keep going so
+            # the steps after a failed check are still measured
+            failed = True
+        cpu = time.process_time() - cpu - (transport.server_seconds - server_before)
+
+        if trace_memory:
+            # Peak traced memory above the step's starting point, not total bytes allocated
+            entry["peak_bytes"] += tracemalloc.get_traced_memory()[1] - baseline
+        else:
+            entry["calls"] += 1
+            entry["match_s"] += matched
+            entry["cpu_s"].append(cpu)
+            entry["failures"] += failed
+
+
+def run_benchmark(repeat=20, seed_items=50):
+    """Replay all scenarios `repeat` times; return per-step statistics."""
+    load_step_definitions()
+    scenarios = collect_scenarios()
+    api = FakeApi(seed_items)
+    transport = MockTransport(api)
+    stats = {}
+
+    with mock.patch.object(requests.Session, "get_adapter", lambda session, url: transport), \
+            contextlib.redirect_stdout(io.StringIO()) as printed:
+        # Pass 1 measures CPU time; pass 2 re-runs under tracemalloc, which would skew timings
+        for _ in range(repeat):
+            for scenario in scenarios:
+                run_scenario(scenario, api, transport, stats, trace_memory=False)
+                printed.seek(0)
+                printed.truncate()
+        tracemalloc.start()
+        try:
+            for scenario in scenarios:
+                run_scenario(scenario, api, transport, stats, trace_memory=True)
+        finally:
+            tracemalloc.stop()
+
+    report = []
+    for location, entry in stats.items():
+        calls = entry["calls"]
+        cpu = sorted(entry["cpu_s"])
+        report.append({
+            "location": location,
+            "step": entry["name"],
+            "calls": calls,
+            "failures": entry["failures"],
+            "match_us": entry["match_s"] / calls * 1e6 if calls else None,
+            "cpu_us_mean": sum(cpu) / calls * 1e6 if calls else None,
+            "cpu_us_p95": percentile(cpu, 95) * 1e6 if calls else None,
+            "cpu_ms_total": sum(cpu) * 1e3,
+            "peak_kib_per_call": entry["peak_bytes"] / 1024.0 / (calls / repeat) if calls else None,
+        })
+    report.sort(key=lambda row: row["cpu_ms_total"], reverse=True)
+    return report
+
+
+def print_report(report):
+    """Print the per-step table, most expensive steps first."""
+    print(f"\n {'step':45} {'calls':>6} {'fail':>5} {'match us':>9} {'cpu us':>9} {'p95 us':>9} {'peak KiB':>10}  location")
+    for row in report:
+        if not row["calls"]:
+            print(f" {row['step']:45} {'-':>6}  {row['location']}")
+            continue
+        print(f" {row['step'][:45]:45} {row['calls']:>6} {row['failures']:>5} {row['match_us']:>9.1f} {row['cpu_us_mean']:>9.1f} "
+              f"{row['cpu_us_p95']:>9.1f} {row['peak_kib_per_call']:>10.1f}  {row['location']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark client-side step overhead with a mocked transport.")
+    parser.add_argument("--repeat", type=int, default=20, help="times to replay every scenario (default: 20)")
+    parser.add_argument("--seed-items", type=int, default=50,
+                        help="todos and projects pre-loaded into the fake API per scenario (default: 50)")
+    parser.add_argument("--json", help="also write the report as JSON to this path")
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(repeat=args.repeat, seed_items=args.seed_items)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,61 @@
+import os
+
 import requests
 
-BASE_URL = "http://localhost:4567"
+import event_stream
+import http_trace
+import time_budget
+
+# The live runner points each parallel worker at its own server through this variable
+BASE_URL_ENV = "BEHAVE_BASE_URL"
+BASE_URL = os.environ.get(BASE_URL_ENV, "http://localhost:4567")
+
+# Set by the soak runner to keep server state between scenarios (surfaces leaks)
+SKIP_RESET_ENV = "BEHAVE_SKIP_RESET"
+
+def before_all(context):
+    """Setup: Hook HTTP requests, time budgets and live events requested by the runner"""
+    http_trace.install_from_env()
+    context.events = event_stream.EventEmitter.from_env()
+    context.watchdog = time_budget.Watchdog.from_env()
+    if context.watchdog:
+        context.watchdog.install()
 
 def before_scenario(context, scenario):
     """Setup: Clear previous test data"""
-    requests.delete(f"{BASE_URL}/projects")
+    if context.events:
+        context.events.scenario_start(scenario)
+    if context.watchdog:
+        context.watchdog.start("scenario", f"{scenario.name} ({scenario.location})")
+    if not os.environ.get(SKIP_RESET_ENV):
+        requests.delete(f"{BASE_URL}/projects")
+    # Tag only the steps' own requests: hook resets must not count as scenario coverage
+    http_trace.set_scenario(str(scenario.location))
+
+def before_step(context, step):
+    """Setup: Start the step's time budget"""
+    if context.watchdog:
+        context.watchdog.start("step", f"{step.keyword} {step.name} ({step.location})")
+
+def after_step(context, step):
+    """Teardown: Stop the step's time budget"""
+    if context.watchdog:
+        context.watchdog.stop("step")
 
 def after_scenario(context, scenario):
     """Teardown: Cleanup after each test"""
-    requests.delete(f"{BASE_URL}/projects")
+    hook_error = None
+    http_trace.set_scenario(None)
+    try:
+        if context.watchdog:
+            context.watchdog.stop("scenario")
+        if not os.environ.get(SKIP_RESET_ENV):
+            requests.delete(f"{BASE_URL}/projects")
+    except Exception as error:
+        hook_error = f"after_scenario failed: {error!r}"
+        raise
+    finally:
+        # Always report the scenario, even when the reset request blew up
+        http_trace.flush()
+        if context.events:
+            context.events.scenario_end(scenario, hook_error)
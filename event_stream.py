@@ -0,0 +1,259 @@
+import json
+import os
+import queue
+import subprocess
+import threading
+import time
+import xml.etree.ElementTree as ET
+
+EVENTS_FD_ENV = "BEHAVE_EVENTS_FD"
+
+
+### BEHAVE SIDE (used from environment.py) ###
+
+class EventEmitter:
+    """Write one JSON event per line to the pipe the runner passed in BEHAVE_EVENTS_FD."""
+
+    def __init__(self, fd):
+        self.pipe = os.fdopen(fd, "w", buffering=1, encoding="utf-8")
+
+    @classmethod
+    def from_env(cls):
+        """Build an emitter when running under the live runner, otherwise None."""
+        fd = os.environ.get(EVENTS_FD_ENV)
+        return cls(int(fd)) if fd else None
+
+    def emit(self, event, **fields):
+        self.pipe.write(json.dumps(dict(fields, event=event, ts=time.time())) + "\n")
+
+    def scenario_start(self, scenario):
+        self.emit("scenario_start", feature=scenario.feature.filename,
+                  scenario=scenario.name, location=str(scenario.location))
+
+    def scenario_end(self, scenario, hook_error=None):
+        """Report the scenario's outcome; `hook_error` fails it for an after_scenario error."""
+        failed_step = next((s for s in scenario.all_steps if s.status.name == "failed"), None)
+        errors = []
+        if failed_step is not None:
+            errors.append(f"{failed_step.keyword} {failed_step.name}\n{failed_step.error_message}")
+        elif scenario.hook_failed:
+            errors.append("Hook failed (see behave output)")
+        if hook_error:
+            errors.append(hook_error)
+        status = "failed" if hook_error else scenario.status.name
+        self.emit("scenario_end", feature=scenario.feature.filename, scenario=scenario.name,
+                  location=str(scenario.location), status=status,
+                  duration=scenario.duration, error="\n".join(errors) or None)
+
+
+### RUNNER SIDE ###
+
+def _run_feature(feature, env, events, feature_timeout, stop, processes, behave_args, log_dir, locations):
+    """Run behave for one feature, forwarding its events into the shared queue."""
+    read_fd, write_fd = os.pipe()
+    env = dict(env, **{EVENTS_FD_ENV: str(write_fd)})
+    if log_dir:
+        log = open(os.path.join(log_dir, feature.replace(os.sep, "_") + ".log"), "w", encoding="utf-8")
+    else:
+        log = subprocess.DEVNULL
+
+    # Behave's own stdout goes to a log file (or nowhere) instead of piling up in memory;
+    # stderr is inherited so watchdog dumps show up as they happen
+    targets = locations.get(feature, [feature])
+    started = time.time()
+    try:
+        process = subprocess.Popen(["behave", *behave_args, *targets], env=env, pass_fds=(write_fd,),
+                                   stdout=log, stderr=None)
+    except OSError as error:
+        # e.g. behave is not on PATH: report the feature as failed instead of losing the worker
+        os.close(read_fd)
+        os.close(write_fd)
+        if log is not subprocess.DEVNULL:
+            log.close()
+        events.put({"event": "feature_end", "feature": feature, "returncode": None, "timed_out": False,
+                    "stopped": stop.is_set(), "duration": time.time() - started,
+                    "error": f"Could not start behave: {error}"})
+        return
+    os.close(write_fd)
+    processes.add(process)
+    timed_out = threading.Event()
+    killer = None
+    if feature_timeout:
+        killer = threading.Timer(feature_timeout, lambda: (timed_out.set(), process.kill()))
+        killer.daemon = True
+        killer.start()
+
+    events.put({"event": "feature_start", "feature": feature})
+    with os.fdopen(read_fd, encoding="utf-8") as pipe:
+        for line in pipe:
+            try:
+                events.put(json.loads(line))
+            except json.JSONDecodeError:
+                continue  # Torn line from a killed process
+    returncode = process.wait()
+    if killer is not None:
+        killer.cancel()
+    processes.discard(process)
+    if log is not subprocess.DEVNULL:
+        log.close()
+    events.put({"event": "feature_end", "feature": feature, "returncode": returncode,
+                "timed_out": timed_out.is_set(), "stopped": stop.is_set(), "duration": time.time() - started})
+
+
+def _worker(features, env, events, feature_timeout, stop, processes, behave_args, log_dir, locations):
+    while not stop.is_set():
+        try:
+            feature = features.get_nowait()
+        except queue.Empty:
+            return
+        _run_feature(feature, env, events, feature_timeout, stop, processes, behave_args, log_dir, locations)
+
+
+class RunResults:
+    """Incrementally merged results from all workers."""
+
+    def __init__(self, total_features):
+        self.total_features = total_features
+        self.features_done = 0
+        self.scenarios = []
+        self.running = {}  # location -> scenario_start event
+        self.started = time.time()
+
+    @property
+    def passed(self):
+        return [s for s in self.scenarios if s["status"] == "passed"]
+
+    @property
+    def failed(self):
+        return [s for s in self.scenarios if s["status"] == "failed"]
+
+    def add(self, event):
+        """Merge one event; return a finished scenario record, if this event produced one."""
+        if event["event"] == "scenario_start":
+            self.running[event["location"]] = event
+        elif event["event"] == "scenario_end":
+            self.running.pop(event["location"], None)
+            self.scenarios.append(event)
+            return event
+        elif event["event"] == "feature_end":
+            self.features_done += 1
+            # Scenarios that never finished were killed with their behave process
+            for location, start in list(self.running.items()):
+                if start["feature"] == event["feature"]:
+                    del self.running[location]
+                    if event["timed_out"]:
+                        status, error = "failed", "Killed: feature budget exceeded"
+                    elif event["stopped"]:
+                        status, error = "skipped", "Stopped by --fail-fast"
+                    else:
+                        status, error = "failed", f"Killed: behave exited with {event['returncode']}"
+                    self.scenarios.append(dict(start, event="scenario_end", status=status,
+                                               duration=time.time() - start["ts"], error=error))
+            if event["returncode"] != 0 and not event["stopped"] and not any(
+                    s["feature"] == event["feature"] and s["status"] == "failed" for s in self.scenarios):
+                return self._feature_failure(event)
+        return None
+
+    def _feature_failure(self, event):
+        """Record a behave run that failed without any failed scenario (bad path, hook error, ...)."""
+        if event.get("error"):
+            error = event["error"]
+        elif event["timed_out"]:
+            error = "Killed: feature budget exceeded"
+        else:
+            error = f"behave exited with {event['returncode']} without a failed scenario (see its output)"
+        record = {"event": "scenario_end", "feature": event["feature"], "scenario": "(behave run)",
+                  "location": event["feature"], "status": "failed", "duration": event["duration"],
+                  "error": error, "ts": time.time()}
+        self.scenarios.append(record)
+        return record
+
+
+def print_progress(results, record):
+    """Print one live progress line for a finished scenario."""
+    mark = {"passed": "✔", "failed": "✘", "skipped": "-"}.get(record["status"], "?")
+    print(f"[{results.features_done}/{results.total_features} features | {len(results.passed)} passed | "
+          f"{len(results.failed)} failed] {mark} {record['location']} {record['scenario']} ({record['duration']:.2f}s)",
+          flush=True)
+    if record["status"] == "failed" and record.get("error"):
+        for line in record["error"].splitlines():
+            print(f"      {line}")
+
+
+def write_json_report(results, path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"duration": time.time() - results.started, "scenarios": results.scenarios}, f, indent=2)
+
+
+def write_junit_report(results, path):
+    """Write a JUnit XML report with one testsuite per feature file."""
+    suites = ET.Element("testsuites")
+    by_feature = {}
+    for record in results.scenarios:
+        by_feature.setdefault(record["feature"], []).append(record)
+    for feature, records in sorted(by_feature.items()):
+        suite = ET.SubElement(suites, "testsuite", name=feature, tests=str(len(records)),
+                              failures=str(sum(r["status"] == "failed" for r in records)),
+                              skipped=str(sum(r["status"] == "skipped" for r in records)),
+                              time=f"{sum(r['duration'] for r in records):.3f}")
+        for record in records:
+            case = ET.SubElement(suite, "testcase", classname=feature, name=f"{record['scenario']} ({record['location']})",
+                                 time=f"{record['duration']:.3f}")
+            if record["status"] == "failed":
+                error = record.get("error") or ""
+                failure = ET.SubElement(case, "failure", message=error.split("\n", 1)[0])
+                failure.text = error
+            elif record["status"] == "skipped":
+                ET.SubElement(case, "skipped")
+    ET.ElementTree(suites).write(path, encoding="utf-8", xml_declaration=True)
+
+
+def run_live(feature_files, worker_envs, fail_fast=False, feature_timeout=None,
+             junit_path=None, json_path=None, log_dir=None, locations=None):
+    """Run features across worker processes, streaming scenario events into one live view.
+
+    One worker runs per environment in `worker_envs`. The scenarios reset and reuse fixed
+    ids on their server, so each worker's environment must point at its own server.
+    `locations` optionally maps a feature file to the "file:line" scenarios to run from it.
+    """
+    features = queue.Queue()
+    for feature in feature_files:
+        features.put(feature)
+    events = queue.Queue()
+    stop = threading.Event()
+    processes = set()
+    behave_args = ["--stop"] if fail_fast else []
+    if log_dir:
+        os.makedirs(log_dir, exist_ok=True)
+
+    threads = [threading.Thread(target=_worker, daemon=True,
+                                args=(features, env, events, feature_timeout, stop, processes, behave_args, log_dir,
+                                      locations or {}))
+               for env in worker_envs]
+    for thread in threads:
+        thread.start()
+
+    results = RunResults(len(feature_files))
+    print(f"\n Running {len(feature_files)} features with {len(threads)} worker(s):\n")
+    while any(thread.is_alive() for thread in threads) or not events.empty():
+        try:
+            event = events.get(timeout=0.2)
+        except queue.Empty:
+            continue
+        record = results.add(event)
+        if record is None:
+            continue
+        print_progress(results, record)
+        if fail_fast and record["status"] == "failed" and not stop.is_set():
+            print("\n⚠ Stopping at the first failure (--fail-fast)\n")
+            stop.set()
+            for process in list(processes):
+                process.terminate()
+
+    print(f"\n {len(results.passed)} scenarios passed, {len(results.failed)} failed "
+          f"in {time.time() - results.started:.1f}s")
+    if json_path:
+        write_json_report(results, json_path)
+    if junit_path:
+        write_junit_report(results, junit_path)
+    return results
@@ -0,0 +1,136 @@
+import atexit
+import json
+import os
+import re
+import time
+from urllib.parse import urlsplit
+
+import requests
+
+import trace_format
+
+TRACE_ENV = "BEHAVE_TRACE_FILE"
+
+_ID_SEGMENT = re.compile(r"^\d+$")
+
+# Per-process hook state: current scenario (set from environment.py), optional trace
+# writer, the request currently waiting on the server and a default-timeout callback
+_state = {"installed": False, "scenario": None, "writer": None, "in_flight": None, "timeout": None}
+
+
+def path_template(path):
+    """Collapse numeric path segments so /todos/12 and /todos/7 count as one endpoint."""
+    segments = path.rstrip("/").split("/")
+    return "/".join(":id" if _ID_SEGMENT.match(s) else s for s in segments) or "/"
+
+
+def endpoint_key(record):
+    """Return the "METHOD /template" label used to group trace records."""
+    return f"{record['method']} {record['template']}"
+
+
+def set_scenario(location):
+    """Tag subsequent trace records with the given scenario location (file:line)."""
+    _state["scenario"] = location
+
+
+class JsonlTraceWriter:
+    """Append one JSON object per request to a line-oriented trace file."""
+
+    def __init__(self, path):
+        # Line buffered so a killed behave process still leaves complete records
+        self.file = open(path, "a", buffering=1, encoding="utf-8")
+
+    def write(self, record):
+        self.file.write(json.dumps(record) + "\n")
+
+    def close(self):
+        self.file.close()
+
+
+def open_writer(path):
+    """Pick the trace writer from the file name: *.bin is binary, anything else JSONL."""
+    if path.endswith(".bin"):
+        return trace_format.BinaryTraceWriter(path)
+    return JsonlTraceWriter(path)
+
+
+def reset_trace(path):
+    """Delete a trace (and its binary sidecars) so a new run never appends to an old one."""
+    for stale in (path, path + ".strings", path + ".idx"):
+        try:
+            os.remove(stale)
+        except FileNotFoundError:
+            pass
+
+
+def flush():
+    """Push buffered trace records to disk (called at the end of every scenario)."""
+    if _state["writer"] is not None and hasattr(_state["writer"], "flush"):
+        _state["writer"].flush()
+
+
+def set_timeout_provider(provider):
+    """Use provider() as the timeout for requests the steps send without one."""
+    _state["timeout"] = provider
+
+
+def in_flight():
+    """Return (method, url, started) for the request awaiting a response, or None."""
+    return _state["in_flight"]
+
+
+def install(trace_path=None):
+    """Wrap requests.Session.request so every call made by the steps goes through us."""
+    if trace_path and _state["writer"] is None:
+        _state["writer"] = open_writer(trace_path)
+        atexit.register(_state["writer"].close)
+    if _state["installed"]:
+        return
+    _state["installed"] = True
+    original_request = requests.Session.request
+
+    def traced_request(session, method, url, **kwargs):
+        if kwargs.get("timeout") is None and _state["timeout"] is not None:
+            kwargs["timeout"] = _state["timeout"]()
+        started = time.time()
+        clock = time.perf_counter()
+        status = 0  # 0 marks a request that never got a response
+        _state["in_flight"] = (method.upper(), url, started)
+        try:
+            response = original_request(session, method, url, **kwargs)
+            status = response.status_code
+            return response
+        finally:
+            _state["in_flight"] = None
+            if _state["writer"] is not None:
+                path = urlsplit(url).path
+                _state["writer"].write({
+                    "ts": started,
+                    "method": method.upper(),
+                    "path": path,
+                    "template": path_template(path),
+                    "status": status,
+                    "elapsed_ms": (time.perf_counter() - clock) * 1000.0,
+                    "scenario": _state["scenario"],
+                })
+
+    requests.Session.request = traced_request
+
+
+def install_from_env():
+    """Install the hook, tracing to BEHAVE_TRACE_FILE when the runner asked for it."""
+    install(os.environ.get(TRACE_ENV))
+
+
+def read_trace(path):
+    """Yield trace records from a binary or JSONL trace file, skipping a torn last line."""
+    if trace_format.is_binary_trace(path):
+        yield from trace_format.read_binary_trace(path)
+        return
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
@@ -1,8 +1,15 @@
+import argparse
 import os
 import random
 import subprocess
+import sys
 import time  # Import time module for delays
 
+import environment
+import event_stream
+import http_trace
+import time_budget
+
 FEATURE_DIR = "features"
 
 def get_feature_files():
@@ -14,7 +21,14 @@ def get_feature_files():
                 feature_files.append(os.path.join(root, file))
     return feature_files
 
-def run_behave_random():
+def behave_env(trace_path=None, step_budget=None, scenario_budget=None):
+    """Environment for behave subprocesses: HTTP trace file and time budgets."""
+    env = dict(os.environ, **time_budget.budget_env(step_budget, scenario_budget))
+    if trace_path:
+        env[http_trace.TRACE_ENV] = trace_path
+    return env
+
+def run_behave_random(env=None, feature_timeout=None):
     """Run behave tests in random order with delays."""
     feature_files = get_feature_files()
     random.shuffle(feature_files)  # Shuffle the feature files
@@ -25,7 +39,13 @@ def run_behave_random():
         print(f"➡ Running: {feature}")
         time.sleep(2)  # Pause before executing the next test
 
-        result = subprocess.run(["behave", feature], capture_output=True, text=True)
+        try:
+            result = subprocess.run(["behave", feature], capture_output=True, text=True,
+                                    env=env, timeout=feature_timeout)
+        except subprocess.TimeoutExpired as e:
+            # Killed by the feature budget: show what it printed and move on
+            print(f"\n⚠ {feature} exceeded the {feature_timeout}s feature budget and was killed")
+            result = subprocess.CompletedProcess(e.cmd, None, as_text(e.stdout), as_text(e.stderr))
 
         print("\n Behave Output:\n")
         print_slow(result.stdout)  # Slow down output printing
@@ -34,6 +54,12 @@ def run_behave_random():
             print("\n⚠ Errors:\n")
             print_slow(result.stderr)
 
+def as_text(output):
+    """Decode partial output from a timed-out subprocess (always bytes or None)."""
+    if isinstance(output, bytes):
+        return output.decode(errors="replace")
+    return output or ""
+
 def print_slow(text, delay=0.001):
     """Print text slowly to record video."""
     for char in text:
@@ -41,5 +67,83 @@ def print_slow(text, delay=0.001):
         time.sleep(delay)
     print()  
 
+def parse_args(argv=None):
+    """Parse runner command line options."""
+    parser = argparse.ArgumentParser(description="Run the behave features in random order.")
+    parser.add_argument("--soak", metavar="DURATION",
+                        help="loop the suite for a duration (e.g. 90m, 4h) while sampling server memory and latency")
+    parser.add_argument("--server-pid", type=int,
+                        help="pid of the API server to sample (default: process listening on the BEHAVE_BASE_URL port, 4567)")
+    parser.add_argument("--sample-interval", type=float, default=5.0,
+                        help="seconds between /proc samples of the server (default: 5)")
+    parser.add_argument("--window", default="5m",
+                        help="latency percentile window for the soak report (default: 5m)")
+    parser.add_argument("--no-reset", action="store_true",
+                        help="in --soak mode, skip the per-scenario DELETE /projects reset so leaks accumulate")
+    parser.add_argument("--report", default="soak_report.json",
+                        help="where to write the soak report (default: soak_report.json)")
+    parser.add_argument("--trace", help="HTTP trace file to record requests into (*.bin for the compact binary format)")
+    parser.add_argument("--live", action="store_true",
+                        help="stream scenario results as they finish instead of printing each feature's output at the end")
+    parser.add_argument("--server", action="append", default=[], metavar="URL",
+                        help="in --live mode, run one parallel worker against each server given "
+                             "(repeatable; every URL must be a separate API instance). Default: one worker on :4567")
+    parser.add_argument("--fail-fast", action="store_true", help="in --live mode, stop at the first failed scenario")
+    parser.add_argument("--junit", help="in --live mode, write a JUnit XML report to this path")
+    parser.add_argument("--json-report", help="in --live mode, write a JSON report to this path")
+    parser.add_argument("--log-dir", help="in --live mode, keep each feature's behave output in this directory")
+    parser.add_argument("--smoke", nargs="?", const="smoke.json", metavar="SELECTION",
+                        help="run only the minimal-coverage scenario subset from smoke.py (default: smoke.json); implies --live")
+    parser.add_argument("--step-timeout", type=float, default=30.0,
+                        help="seconds a single step may take before it is failed (default: 30)")
+    parser.add_argument("--scenario-timeout", type=float, default=120.0,
+                        help="seconds a scenario may take before it is failed (default: 120)")
+    parser.add_argument("--feature-timeout", type=float, default=600.0,
+                        help="seconds before a whole behave run of one feature is killed (default: 600)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.trace:
+        http_trace.reset_trace(args.trace)
+    env = behave_env(args.trace, args.step_timeout, args.scenario_timeout)
+    if args.soak:
+        import soak
+        soak.run_soak(
+            get_feature_files(),
+            soak.parse_duration(args.soak),
+            args.report,
+            server_pid=args.server_pid,
+            interval=args.sample_interval,
+            window=soak.parse_duration(args.window),
+            reset=not args.no_reset,
+            env=env,
+            feature_timeout=args.feature_timeout,
+        )
+    elif args.live or args.smoke:
+        locations = None
+        if args.smoke:
+            import smoke
+            locations = smoke.group_by_feature(smoke.load_selection(args.smoke))
+            feature_files = list(locations)
+        else:
+            feature_files = get_feature_files()
+        random.shuffle(feature_files)
+        # Workers never share a server: every scenario wipes /projects and reuses fixed ids
+        worker_envs = [dict(env, **{environment.BASE_URL_ENV: url}) for url in dict.fromkeys(args.server)] or [env]
+        results = event_stream.run_live(
+            feature_files,
+            worker_envs,
+            fail_fast=args.fail_fast,
+            feature_timeout=args.feature_timeout,
+            junit_path=args.junit,
+            json_path=args.json_report,
+            log_dir=args.log_dir,
+            locations=locations,
+        )
+        sys.exit(1 if results.failed else 0)
+    else:
+        run_behave_random(env=env, feature_timeout=args.feature_timeout)
+
 if __name__ == "__main__":
-    run_behave_random()
+    main()
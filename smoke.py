@@ -0,0 +1,101 @@
+import argparse
+import json
+
+import http_trace
+
+DEFAULT_SELECTION = "smoke.json"
+
+
+def build_matrix(records, passing=None):
+    """Map each scenario location to the (method, template, status) combinations it hit.
+
+    When `passing` is given, only scenarios in it are kept, so the smoke set never
+    relies on a scenario that is currently failing.
+    """
+    matrix = {}
+    for record in records:
+        scenario = record.get("scenario")
+        if scenario is None or (passing is not None and scenario not in passing):
+            continue
+        matrix.setdefault(scenario, set()).add((record["method"], record["template"], record["status"]))
+    return matrix
+
+
+def select_minimal(matrix):
+    """Pick a small set of scenarios that still covers every combination in the matrix.
+
+    Minimum set cover is NP-hard, so this is the usual greedy approximation (take the
+    scenario adding the most uncovered combinations, cheaper scenarios first on ties)
+    followed by a pass that drops any pick made redundant by later ones.
+    """
+    uncovered = set().union(*matrix.values())
+    selected = []
+    while uncovered:
+        best = max(sorted(matrix), key=lambda s: (len(matrix[s] & uncovered), -len(matrix[s])))
+        selected.append(best)
+        uncovered -= matrix[best]
+
+    for scenario in list(reversed(selected)):
+        rest = set().union(*(matrix[s] for s in selected if s != scenario))
+        if matrix[scenario] <= rest:
+            selected.remove(scenario)
+    return sorted(selected, key=_location_key)
+
+
+def _location_key(location):
+    filename, _, line = location.rpartition(":")
+    return filename, int(line)
+
+
+def group_by_feature(locations):
+    """Group "file:line" locations per feature file, in file order."""
+    groups = {}
+    for location in sorted(locations, key=_location_key):
+        groups.setdefault(location.rpartition(":")[0], []).append(location)
+    return groups
+
+
+def load_passing(report_path):
+    """Read the passing scenario locations from a --json-report file."""
+    with open(report_path, encoding="utf-8") as f:
+        report = json.load(f)
+    return {s["location"] for s in report["scenarios"] if s["status"] == "passed"}
+
+
+def load_selection(path=DEFAULT_SELECTION):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)["scenarios"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Compute a minimal smoke subset of scenarios from a traced run (runner --trace).")
+    parser.add_argument("trace", help="trace (JSONL or *.bin) recorded with run_behave_random.py --trace")
+    parser.add_argument("-o", "--output", default=DEFAULT_SELECTION,
+                        help=f"where to write the selection (default: {DEFAULT_SELECTION})")
+    parser.add_argument("--results", help="--json-report from the same run; only passing scenarios are used")
+    args = parser.parse_args(argv)
+
+    passing = load_passing(args.results) if args.results else None
+    matrix = build_matrix(http_trace.read_trace(args.trace), passing)
+    selected = select_minimal(matrix)
+    combinations = sorted(set().union(*matrix.values()))
+
+    print(f"\n {len(combinations)} endpoint/method/status combinations across {len(matrix)} scenarios\n")
+    for method, template, status in combinations:
+        covering = [s for s in selected if (method, template, status) in matrix[s]]
+        print(f"  {method:7} {template:40} {status:>3}  <- {covering[0]}")
+    print(f"\n Smoke subset: {len(selected)} of {len(matrix)} scenarios")
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({
+            "trace": args.trace,
+            "total_scenarios": len(matrix),
+            "combinations": [list(c) for c in combinations],
+            "scenarios": selected,
+        }, f, indent=2)
+    print(f" Selection written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+import json
+import math
+import os
+import random
+import subprocess
+import threading
+import time
+from urllib.parse import urlsplit
+
+import environment
+import http_trace
+import trace_format
+from trace_format import percentile
+
+# Sample the server the steps talk to (BEHAVE_BASE_URL, localhost:4567 by default)
+SERVER_PORT = urlsplit(environment.BASE_URL).port or 80
+
+
+def parse_duration(text):
+    """Parse durations like "90", "45s", "30m" or "2h" into seconds."""
+    units = {"s": 1, "m": 60, "h": 3600}
+    text = text.strip().lower()
+    if text and text[-1] in units:
+        return float(text[:-1]) * units[text[-1]]
+    return float(text)
+
+
+def find_listening_pid(port=SERVER_PORT):
+    """Find the pid of the process listening on a local TCP port via /proc."""
+    inodes = set()
+    for table in ("/proc/net/tcp", "/proc/net/tcp6"):
+        try:
+            with open(table) as f:
+                next(f)  # Header line
+                for line in f:
+                    fields = line.split()
+                    local_port = int(fields[1].rsplit(":", 1)[1], 16)
+                    if local_port == port and fields[3] == "0A":  # 0A = LISTEN
+                        inodes.add(fields[9])
+        except OSError:
+            continue
+    if not inodes:
+        return None
+
+    targets = {f"socket:[{inode}]" for inode in inodes}
+    for pid in filter(str.isdigit, os.listdir("/proc")):
+        fd_dir = f"/proc/{pid}/fd"
+        try:
+            for fd in os.listdir(fd_dir):
+                if os.readlink(os.path.join(fd_dir, fd)) in targets:
+                    return int(pid)
+        except OSError:
+            continue  # Process exited or belongs to another user
+    return None
+
+
+def sample_process(pid):
+    """Read RSS (kB), thread count and open file descriptors for a pid from /proc."""
+    sample = {"t": time.time(), "rss_kb": None, "threads": None, "fds": None}
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                sample["rss_kb"] = int(line.split()[1])
+            elif line.startswith("Threads:"):
+                sample["threads"] = int(line.split()[1])
+    try:
+        sample["fds"] = len(os.listdir(f"/proc/{pid}/fd"))
+    except PermissionError:
+        pass  # Server runs as another user; RSS and threads are still readable
+    return sample
+
+
+class ProcessSampler(threading.Thread):
+    """Background thread sampling a server process at a fixed interval."""
+
+    def __init__(self, pid, interval):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.samples = []
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.is_set():
+            try:
+                self.samples.append(sample_process(self.pid))
+            except OSError:
+                print(f"⚠ Server process {self.pid} is gone, stopping sampler")
+                return
+            self.stopped.wait(self.interval)
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+def summarize_windows(records, start, window):
+    """Group trace records into fixed time windows with per-endpoint latency percentiles."""
+    buckets = {}  # window index -> endpoint -> (latencies, [error count])
+    for record in records:
+        if record["ts"] < start:
+            continue  # Left over from an earlier run sharing the trace file
+        index = int((record["ts"] - start) // window)
+        # Keep only the latency and an error tally, not the record: soaks run for hours
+        latencies, errors = buckets.setdefault(index, {}).setdefault(http_trace.endpoint_key(record), ([], [0]))
+        latencies.append(record["elapsed_ms"])
+        errors[0] += record["status"] == 0 or record["status"] >= 500
+
+    windows = []
+    for index in sorted(buckets):
+        endpoints = {}
+        for endpoint, (latencies, errors) in sorted(buckets[index].items()):
+            latencies.sort()
+            endpoints[endpoint] = {
+                "count": len(latencies),
+                "errors": errors[0],
+                "p50_ms": percentile(latencies, 50),
+                "p95_ms": percentile(latencies, 95),
+                "p99_ms": percentile(latencies, 99),
+            }
+        windows.append({
+            "start": start + index * window,
+            "end": start + (index + 1) * window,
+            "endpoints": endpoints,
+        })
+    return windows
+
+
+def summarize_binary_windows(path, start, end, window):
+    """Same as summarize_windows for a binary trace, letting its index skip other windows."""
+    windows = []
+    with trace_format.BinaryTraceReader(path) as reader:
+        for index in range(math.ceil((end - start) / window)):
+            window_start = start + index * window
+            endpoints = reader.endpoint_percentiles(since=window_start, until=window_start + window)
+            if endpoints:
+                windows.append({"start": window_start, "end": window_start + window, "endpoints": endpoints})
+    return windows
+
+
+def summarize_drift(samples, windows):
+    """Compare the first and last window/sample to expose leaks and slow degradation."""
+    drift = {"process": {}, "endpoints": {}}
+    if len(samples) >= 2:
+        first, last = samples[0], samples[-1]
+        for key in ("rss_kb", "threads", "fds"):
+            if first[key] is not None and last[key] is not None:
+                drift["process"][key] = {"first": first[key], "last": last[key], "delta": last[key] - first[key]}
+    if len(windows) >= 2:
+        first, last = windows[0]["endpoints"], windows[-1]["endpoints"]
+        for endpoint in sorted(set(first) & set(last)):
+            before, after = first[endpoint]["p95_ms"], last[endpoint]["p95_ms"]
+            drift["endpoints"][endpoint] = {"first_p95_ms": before, "last_p95_ms": after, "ratio": after / before if before else None}
+    return drift
+
+
+def print_drift(drift):
+    """Print a short human-readable drift summary."""
+    print("\n Soak Drift Summary:\n")
+    for key, values in drift["process"].items():
+        print(f"  {key:8} {values['first']:>10} -> {values['last']:>10}  ({values['delta']:+})")
+    for endpoint, values in drift["endpoints"].items():
+        ratio = f"x{values['ratio']:.2f}" if values["ratio"] is not None else "n/a"
+        print(f"  {endpoint:45} p95 {values['first_p95_ms']:8.1f} -> {values['last_p95_ms']:8.1f} ms  ({ratio})")
+
+
+def run_soak(feature_files, duration, report_path, server_pid=None, interval=5.0, window=300.0, reset=True, env=None, feature_timeout=None):
+    """Loop the feature suite for `duration` seconds while sampling the server process."""
+    server_pid = server_pid or find_listening_pid()
+    if server_pid is None:
+        raise SystemExit(f"Could not find a process listening on port {SERVER_PORT}; pass --server-pid")
+
+    env = dict(env or os.environ)
+    trace_path = env.setdefault(http_trace.TRACE_ENV, f"{report_path}.trace.jsonl")
+    http_trace.reset_trace(trace_path)
+    if not reset:
+        env[environment.SKIP_RESET_ENV] = "1"
+
+    sampler = ProcessSampler(server_pid, interval)
+    start = time.time()
+    deadline = start + duration
+    iterations = 0
+    failed_runs = 0
+
+    print(f"\n Soaking server pid {server_pid} for {duration:.0f}s:\n")
+    sampler.start()
+    try:
+        while time.time() < deadline:
+            iterations += 1
+            random.shuffle(feature_files)
+            for feature in feature_files:
+                if time.time() >= deadline:
+                    break
+                try:
+                    result = subprocess.run(["behave", feature], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                                            env=env, timeout=feature_timeout)
+                    failed = result.returncode != 0
+                except subprocess.TimeoutExpired:
+                    print(f"⚠ {feature} exceeded the {feature_timeout}s feature budget and was killed")
+                    failed = True
+                failed_runs += failed
+            elapsed = time.time() - start
+            print(f"➡ Iteration {iterations} done after {elapsed:.0f}s ({failed_runs} failed feature runs so far)")
+    finally:
+        sampler.stop()
+
+    if trace_format.is_binary_trace(trace_path):
+        windows = summarize_binary_windows(trace_path, start, time.time(), window)
+    else:
+        windows = summarize_windows(http_trace.read_trace(trace_path), start, window)
+    report = {
+        "server_pid": server_pid,
+        "start": start,
+        "duration_s": time.time() - start,
+        "iterations": iterations,
+        "failed_feature_runs": failed_runs,
+        "window_s": window,
+        "samples": sampler.samples,
+        "windows": windows,
+        "drift": summarize_drift(sampler.samples, windows),
+    }
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print_drift(report["drift"])
+    print(f"\n Soak report written to {report_path}")
+    return report
@@ -2,7 +2,7 @@ import requests
 import json
 from behave import given, when, then
 
-BASE_URL = "http://localhost:4567"
+from environment import BASE_URL  # Per-worker server (runner --server)
 
 def get_json_response(context):
     """Safely parse JSON response, handling empty responses."""
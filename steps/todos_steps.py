@@ -1,7 +1,7 @@
 import requests
 from behave import given, when, then
 
-BASE_URL = "http://localhost:4567"
+from environment import BASE_URL  # Per-worker server (runner --server)
 
 ### GIVEN STEPS (Preconditions) ###
 
@@ -0,0 +1,34 @@
+import smoke
+
+
+def test_select_minimal_covers_every_combination():
+    matrix = {
+        "features/a.feature:3": {("GET", "/todos", 200), ("POST", "/todos", 201)},
+        "features/a.feature:9": {("GET", "/todos", 200)},
+        "features/b.feature:4": {("GET", "/todos/:id", 404), ("DELETE", "/todos/:id", 200)},
+        "features/b.feature:12": {("POST", "/todos", 201), ("GET", "/todos/:id", 404)},
+        "features/c.feature:7": {("PUT", "/projects/:id", 200)},
+    }
+    selected = smoke.select_minimal(matrix)
+
+    assert set().union(*(matrix[s] for s in selected)) == set().union(*matrix.values())
+    assert selected == ["features/a.feature:3", "features/b.feature:4", "features/c.feature:7"]
+
+
+def test_select_minimal_prunes_picks_made_redundant():
+    # Greedy takes "big" first, then needs both halves; "big" then adds nothing
+    matrix = {
+        "f.feature:1": {1, 2, 3, 4},
+        "f.feature:2": {1, 2, 5},
+        "f.feature:3": {3, 4, 6},
+    }
+    assert smoke.select_minimal(matrix) == ["f.feature:2", "f.feature:3"]
+
+
+def test_build_matrix_skips_hook_traffic():
+    records = [
+        {"method": "DELETE", "template": "/projects", "status": 200, "scenario": None},
+        {"method": "GET", "template": "/todos", "status": 200, "scenario": "f.feature:1"},
+        {"method": "GET", "template": "/todos", "status": 200, "scenario": "f.feature:2"},
+    ]
+    assert smoke.build_matrix(records, passing={"f.feature:1"}) == {"f.feature:1": {("GET", "/todos", 200)}}
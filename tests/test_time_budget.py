@@ -0,0 +1,117 @@
+import contextlib
+import time
+
+import pytest
+from behave.matchers import Match
+
+import http_trace
+import time_budget
+from time_budget import BudgetExceeded, Watchdog
+
+
+@pytest.fixture
+def interrupts(monkeypatch):
+    """Record async exceptions the watchdog would inject instead of raising them."""
+    calls = []
+    monkeypatch.setattr(time_budget, "_raise_in_thread", lambda *args: calls.append(args))
+    return calls
+
+
+@pytest.fixture
+def watchdog(monkeypatch):
+    watchdog = Watchdog(step_budget=30.0, scenario_budget=60.0)
+    monkeypatch.setattr(watchdog, "dump", lambda kind: None)
+    yield watchdog
+    for kind in ("step", "scenario"):
+        watchdog.stop(kind)
+
+
+class FakeContext:
+    """Just enough of behave's Context for Match.run."""
+
+    @contextlib.contextmanager
+    def use_with_user_mode(self):
+        yield
+
+
+def test_step_after_expired_scenario_fails(watchdog, interrupts):
+    watchdog.start("scenario", "scenario")
+    watchdog.expire("scenario")  # Between steps: deferred, not injected
+
+    assert interrupts == []
+    with pytest.raises(BudgetExceeded, match="scenario budget of 60.0s exceeded"):
+        watchdog.start("step", "next step")
+
+    watchdog.start("scenario", "next scenario")  # A new scenario starts with a clean slate
+    watchdog.start("step", "first step")
+
+
+def test_expire_only_interrupts_a_running_step_body(watchdog, interrupts):
+    watchdog.start("step", "step")
+    watchdog.expire("step")
+    assert interrupts == []
+    assert watchdog.expired is None  # A step that already returned just finished late
+
+    watchdog.start("step", "step")
+    watchdog.step_active = True
+    watchdog.expire("step")
+    assert interrupts == [(watchdog.main_thread_id, BudgetExceeded)]
+
+
+class ExceptionOnCancel:
+    """Timer stand-in simulating BudgetExceeded delivered while stop() holds the lock."""
+
+    def cancel(self):
+        raise BudgetExceeded
+
+
+@pytest.mark.parametrize("timer", [None, ExceptionOnCancel()])
+def test_stop_always_clears_the_budget(watchdog, timer):
+    watchdog.start("step", "step")
+    if timer is not None:
+        watchdog.timers["step"].cancel()
+        watchdog.timers["step"] = timer
+
+    watchdog.stop("step")
+
+    assert watchdog.timers["step"] is None
+    assert watchdog.deadlines["step"] is None
+    assert watchdog.labels["step"] is None
+    assert not watchdog.lock.locked()
+
+
+def test_request_timeout(watchdog):
+    assert watchdog.request_timeout() == 60.0  # No running budget: the largest one
+
+    watchdog.start("scenario", "scenario")
+    watchdog.start("step", "step")
+    assert 30.0 < watchdog.request_timeout() <= 30.0 + time_budget.REQUEST_GRACE
+
+    watchdog.deadlines["step"] = time.monotonic() - 5
+    assert watchdog.request_timeout() == time_budget.REQUEST_GRACE
+
+
+def test_slow_step_is_failed_inside_match_run(monkeypatch, capfd):
+    monkeypatch.setattr(Match, "run", Match.run)
+    monkeypatch.setitem(http_trace._state, "timeout", None)
+    watchdog = Watchdog(step_budget=0.2)
+    watchdog.install()
+    iterations = []
+
+    def slow_step(context):
+        for _ in range(500):  # Busy Python code, not one long C call, so the interrupt lands
+            iterations.append(None)
+            time.sleep(0.01)
+
+    watchdog.start("step", "Given a slow step")
+    started = time.monotonic()
+    try:
+        with pytest.raises(BudgetExceeded):
+            Match(slow_step, arguments=[]).run(FakeContext())
+    finally:
+        watchdog.stop("step")
+
+    assert time.monotonic() - started < 2
+    assert len(iterations) < 500
+    assert not watchdog.step_active
+    assert "WATCHDOG: step budget of 0.2s exceeded" in capfd.readouterr().err
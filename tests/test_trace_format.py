@@ -0,0 +1,114 @@
+import json
+
+import pytest
+
+import trace_format
+
+RECORDS = [
+    {"ts": 1700000000.125, "method": "GET", "path": "/todos", "template": "/todos", "status": 200,
+     "elapsed_ms": 1.7234981, "scenario": "features/todos/get_todo.feature:5"},
+    {"ts": 1700000001.25, "method": "POST", "path": "/todos", "template": "/todos", "status": 201,
+     "elapsed_ms": 4.0817, "scenario": "features/todos/create_todo.feature:9"},
+    {"ts": 1700000002.375, "method": "GET", "path": "/todos/12/tasksof", "template": "/todos/:id/tasksof",
+     "status": 404, "elapsed_ms": 3.14159265, "scenario": "features/todos/get_todo.feature:12"},
+    {"ts": 1700000003.5, "method": "DELETE", "path": "/projects", "template": "/projects", "status": 200,
+     "elapsed_ms": 0.6103, "scenario": None},
+]
+
+
+def write_jsonl(path, records):
+    with open(path, "w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+
+
+def write_binary(path, records):
+    writer = trace_format.BinaryTraceWriter(str(path))
+    for record in records:
+        writer.write(record)
+    writer.close()
+
+
+def test_jsonl_binary_round_trip(tmp_path):
+    src, binary, back = tmp_path / "trace.jsonl", tmp_path / "trace.bin", tmp_path / "back.jsonl"
+    write_jsonl(src, RECORDS)
+
+    assert trace_format.jsonl_to_binary(str(src), str(binary)) == len(RECORDS)
+    assert trace_format.is_binary_trace(str(binary))
+    assert trace_format.binary_to_jsonl(str(binary), str(back)) == len(RECORDS)
+
+    with open(back, encoding="utf-8") as f:
+        assert [json.loads(line) for line in f] == RECORDS
+
+
+def test_torn_final_record_is_ignored(tmp_path):
+    path = tmp_path / "trace.bin"
+    write_binary(path, RECORDS)
+    with open(path, "ab") as f:
+        f.write(trace_format.RECORD.pack(1700000004.0, 1.0, 0, 0, 0, 0, 200)[:-5])
+
+    with trace_format.BinaryTraceReader(str(path)) as reader:
+        assert len(reader) == len(RECORDS)
+        assert [r["ts"] for r in reader.records()] == [r["ts"] for r in RECORDS]
+
+
+@pytest.mark.parametrize("filters, expected", [
+    ({"method": "GET"}, [0, 2]),
+    ({"template": "/todos"}, [0, 1]),
+    ({"method": "GET", "template": "/todos/:id/tasksof"}, [2]),
+    ({"template": "/todos/12/tasksof"}, []),  # Filters match templates, not raw paths
+    ({"method": "PATCH"}, []),
+    ({"status": 200}, [0, 3]),
+    ({"status": 404, "template": "/todos"}, []),
+    ({"since": RECORDS[1]["ts"], "until": RECORDS[3]["ts"]}, [1, 2]),
+])
+def test_filters(tmp_path, filters, expected):
+    path = tmp_path / "trace.bin"
+    write_binary(path, RECORDS)
+    with trace_format.BinaryTraceReader(str(path)) as reader:
+        assert list(reader.records(**filters)) == [RECORDS[i] for i in expected]
+
+
+def test_endpoint_percentiles(tmp_path):
+    path = tmp_path / "trace.bin"
+    write_binary(path, RECORDS + [dict(RECORDS[0], ts=1700000005.0, status=0, elapsed_ms=30000.25)])
+    with trace_format.BinaryTraceReader(str(path)) as reader:
+        summary = reader.endpoint_percentiles(pcts=(50, 99), method="GET")
+    assert summary == {
+        "GET /todos": {"count": 2, "errors": 1, "p50_ms": 1.7234981, "p99_ms": 30000.25},
+        "GET /todos/:id/tasksof": {"count": 1, "errors": 0, "p50_ms": 3.14159265, "p99_ms": 3.14159265},
+    }
+
+
+def test_older_format_is_rejected(tmp_path):
+    path = tmp_path / "trace.bin"
+    write_binary(path, RECORDS)
+    with open(path, "r+b") as f:
+        f.write(b"HTRACE1\n")
+    with pytest.raises(ValueError):
+        trace_format.BinaryTraceReader(str(path))
+
+
+def test_index_skips_chunks_without_changing_results(tmp_path, monkeypatch):
+    monkeypatch.setattr(trace_format, "INDEX_CHUNK", 4)
+    monkeypatch.setattr(trace_format, "SCAN_BYTES", trace_format.RECORD.size * 4)
+    path = str(tmp_path / "trace.bin")
+    records = [dict(RECORDS[i % len(RECORDS)], ts=float(i)) for i in range(30)]
+    write_binary(path, records[:18])
+
+    with trace_format.BinaryTraceReader(path) as reader:
+        assert [chunk["records"] for chunk in reader.index] == [4, 4, 4, 4, 2]
+
+    # Appending extends the saved index, including the partial last chunk
+    write_binary(path, records[18:])
+    with trace_format.BinaryTraceReader(path) as reader:
+        assert [chunk["records"] for chunk in reader.index] == [4] * 7 + [2]
+        admitted = []
+        may_match = reader._chunk_may_match
+        monkeypatch.setattr(reader, "_chunk_may_match", lambda *args: admitted.append(may_match(*args)) or admitted[-1])
+        indexed = list(reader.records(since=9.0, until=13.0))
+
+    with trace_format.BinaryTraceReader(path, use_index=False) as reader:
+        assert indexed == list(reader.records(since=9.0, until=13.0))
+    assert [r["ts"] for r in indexed] == [9.0, 10.0, 11.0, 12.0]
+    assert sum(map(bool, admitted)) == 2  # Only the chunks holding 8-11 and 12-15 are decoded
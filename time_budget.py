@@ -0,0 +1,161 @@
+import ctypes
+import os
+import sys
+import threading
+import time
+import traceback
+
+from behave.matchers import Match
+
+import http_trace
+
+STEP_BUDGET_ENV = "BEHAVE_STEP_BUDGET"
+SCENARIO_BUDGET_ENV = "BEHAVE_SCENARIO_BUDGET"
+
+# Requests time out this long after the budget so the watchdog can dump them first
+REQUEST_GRACE = 0.5
+
+
+class BudgetExceeded(Exception):
+    """Raised inside a step that ran past its step or scenario time budget."""
+
+
+def budget_env(step_budget=None, scenario_budget=None):
+    """Environment variables that pass time budgets from the runner to behave."""
+    env = {}
+    if step_budget:
+        env[STEP_BUDGET_ENV] = str(step_budget)
+    if scenario_budget:
+        env[SCENARIO_BUDGET_ENV] = str(scenario_budget)
+    return env
+
+
+def _raise_in_thread(thread_id, exc_type):
+    """Ask the interpreter to raise exc_type in another thread at its next bytecode."""
+    ctypes.pythonapi.PyThreadState_SetAsyncExc(ctypes.c_ulong(thread_id), ctypes.py_object(exc_type))
+
+
+class Watchdog:
+    """Enforce per-step and per-scenario time budgets inside a behave process.
+
+    Requests sent without a timeout get the remaining budget as their timeout, so a
+    stalled server response fails the step instead of hanging. If a budget runs out
+    while Python code is still busy, the watchdog dumps the in-flight request and the
+    main thread's stack to stderr and raises BudgetExceeded in the running step.
+
+    The exception is only ever raised while a step function itself is running (see
+    step_active), where behave catches it as a step failure; a budget that runs out
+    anywhere else fails the next step instead.
+    """
+
+    def __init__(self, step_budget=None, scenario_budget=None):
+        self.budgets = {"step": step_budget, "scenario": scenario_budget}
+        self.deadlines = {"step": None, "scenario": None}
+        self.timers = {"step": None, "scenario": None}
+        self.labels = {"step": None, "scenario": None}
+        self.expired = None  # Budget that ran out between steps, reported at the next step
+        self.step_active = False  # True only while a step function body is executing
+        self.main_thread_id = threading.main_thread().ident
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        """Build a watchdog from the runner's environment, or None if no budget is set."""
+        step_budget = float(os.environ.get(STEP_BUDGET_ENV) or 0) or None
+        scenario_budget = float(os.environ.get(SCENARIO_BUDGET_ENV) or 0) or None
+        if step_budget is None and scenario_budget is None:
+            return None
+        return cls(step_budget, scenario_budget)
+
+    def install(self):
+        """Bound every request the steps send by the remaining budget and track step bodies."""
+        http_trace.set_timeout_provider(self.request_timeout)
+        original_run = Match.run
+        watchdog = self
+
+        def run_step(match, context):
+            with watchdog.lock:
+                watchdog.step_active = True
+            try:
+                return original_run(match, context)
+            finally:
+                watchdog.end_step_body()
+
+        Match.run = run_step
+
+    def end_step_body(self):
+        """Clear step_active as the step function returns (still inside behave's try)."""
+        try:
+            with self.lock:
+                self.step_active = False
+        except BudgetExceeded:
+            # Delivered just as the body returned: still a failure of this step
+            self.step_active = False
+            raise
+
+    def request_timeout(self):
+        deadlines = [d for d in self.deadlines.values() if d is not None]
+        if not deadlines:
+            # Hook requests outside any running budget still must not hang forever
+            return max(b for b in self.budgets.values() if b is not None)
+        return max(min(deadlines) - time.monotonic(), 0) + REQUEST_GRACE
+
+    def start(self, kind, label):
+        with self.lock:
+            self.labels[kind] = label
+            if kind == "scenario":
+                self.expired = None
+            elif self.expired:
+                raise BudgetExceeded(f"{self.expired} budget of {self.budgets[self.expired]}s exceeded")
+            budget = self.budgets[kind]
+            if budget is None:
+                return
+            self.deadlines[kind] = time.monotonic() + budget
+            self.timers[kind] = threading.Timer(budget, self.expire, args=(kind,))
+            self.timers[kind].daemon = True
+            self.timers[kind].start()
+
+    def stop(self, kind):
+        try:
+            with self.lock:
+                if self.timers[kind] is not None:
+                    self.timers[kind].cancel()
+        except BudgetExceeded:
+            pass  # The step is already over; nothing left to interrupt
+        finally:
+            self.timers[kind] = None
+            self.deadlines[kind] = None
+            self.labels[kind] = None
+
+    def expire(self, kind):
+        with self.lock:
+            if self.timers[kind] is None:
+                return  # Finished while the timer was firing
+            self.timers[kind] = None
+            self.dump(kind)
+            if not self.step_active:
+                # Behave's own code or a hook is running. A step that already returned has
+                # simply finished late; an expired scenario fails at its next step instead
+                if kind == "scenario":
+                    self.expired = kind
+            else:
+                _raise_in_thread(self.main_thread_id, BudgetExceeded)
+
+    def dump(self, kind):
+        """Write the in-flight request and the main thread's stack to the real stderr."""
+        out = sys.__stderr__
+        out.write(f"\n==== WATCHDOG: {kind} budget of {self.budgets[kind]}s exceeded ====\n")
+        out.write(f"Scenario: {self.labels['scenario']}\n")
+        out.write(f"Step: {self.labels['step']}\n")
+        request = http_trace.in_flight()
+        if request:
+            method, url, started = request
+            out.write(f"In-flight request: {method} {url} (waiting {time.time() - started:.1f}s)\n")
+        else:
+            out.write("In-flight request: none\n")
+        frame = sys._current_frames().get(self.main_thread_id)
+        if frame is not None:
+            out.write("Main thread stack:\n")
+            out.write("".join(traceback.format_stack(frame)))
+        out.write("=====================================\n")
+        out.flush()
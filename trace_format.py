@@ -0,0 +1,354 @@
+"""Compact binary HTTP trace format with an mmap-backed reader.
+
+A trace is two files, plus an optional index:
+
+* ``<path>``: an 8-byte magic header followed by fixed-width little-endian records
+  (start time f64, elapsed ms f64, method/template/path/scenario string ids u32, status u16).
+* ``<path>.strings``: the interned strings, one JSON string per line; line n is id n.
+* ``<path>.idx``: a sparse index written by readers, one entry per chunk of INDEX_CHUNK
+  records (min/max start time, bitmaps of the method and template ids, the statuses seen)
+  so queries skip chunks that cannot match. It is rebuilt whenever it looks stale.
+
+Methods, paths, path templates and scenario locations are interned, so a record is
+34 bytes however long the strings are, and converting to JSONL and back is lossless.
+Several behave processes may append to the same trace: records are written with O_APPEND
+in whole-record chunks, and new strings are interned under an exclusive lock on the
+strings file so every writer agrees on the ids.
+"""
+import argparse
+import contextlib
+import fcntl
+import json
+import math
+import mmap
+import os
+import struct
+
+MAGIC = b"HTRACE2\n"
+RECORD = struct.Struct("<ddIIIIH")
+NO_STRING = 0xFFFFFFFF  # Scenario id for requests made outside any scenario
+
+# Flush buffered records once this many bytes are pending
+FLUSH_BYTES = 64 * 1024
+# Records per sparse index entry; readers also decode one chunk per slice
+INDEX_CHUNK = 4096
+SCAN_BYTES = RECORD.size * INDEX_CHUNK
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not values:
+        return None
+    rank = math.ceil(pct / 100.0 * len(values))
+    return values[min(max(rank, 1), len(values)) - 1]
+
+
+def is_binary_trace(path):
+    """True if `path` starts with the binary trace magic header."""
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def _strings_path(path):
+    return path + ".strings"
+
+
+def _index_path(path):
+    return path + ".idx"
+
+
+def _index_chunk(data):
+    """Summarize one chunk of packed records as a sparse index entry."""
+    min_ts = max_ts = None
+    methods = templates = 0
+    statuses = set()
+    for ts, _, method, template, _, _, status in RECORD.iter_unpack(data):
+        min_ts = ts if min_ts is None else min(min_ts, ts)
+        max_ts = ts if max_ts is None else max(max_ts, ts)
+        methods |= 1 << method
+        templates |= 1 << template
+        statuses.add(status)
+    return {"records": len(data) // RECORD.size, "min_ts": min_ts, "max_ts": max_ts,
+            "methods": methods, "templates": templates, "statuses": sorted(statuses)}
+
+
+class BinaryTraceWriter:
+    """Buffered appender for binary traces; same write()/close() interface as JsonlTraceWriter."""
+
+    def __init__(self, path):
+        self.fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self.strings = open(_strings_path(path), "a+", encoding="utf-8")
+        with self._locked():
+            if os.fstat(self.fd).st_size == 0:
+                os.write(self.fd, MAGIC)
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(_index_path(path))  # Describes an earlier trace
+        self.ids = {}
+        self.strings_offset = 0
+        self.buffer = bytearray()
+
+    @contextlib.contextmanager
+    def _locked(self):
+        fcntl.flock(self.strings, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self.strings, fcntl.LOCK_UN)
+
+    def _sync_strings(self):
+        """Pick up strings other writers appended since we last looked."""
+        self.strings.seek(self.strings_offset)
+        for line in self.strings:
+            self.ids.setdefault(json.loads(line), len(self.ids))
+        self.strings_offset = self.strings.tell()
+
+    def intern(self, text):
+        if text is None:
+            return NO_STRING
+        string_id = self.ids.get(text)
+        if string_id is None:
+            with self._locked():
+                self._sync_strings()
+                string_id = self.ids.get(text)
+                if string_id is None:
+                    self.strings.seek(0, os.SEEK_END)
+                    self.strings.write(json.dumps(text) + "\n")
+                    self.strings.flush()
+                    self.strings_offset = self.strings.tell()
+                    string_id = self.ids[text] = len(self.ids)
+        return string_id
+
+    def write(self, record):
+        self.buffer += RECORD.pack(
+            record["ts"],
+            record["elapsed_ms"],
+            self.intern(record["method"]),
+            self.intern(record["template"]),
+            self.intern(record.get("path", record["template"])),
+            self.intern(record.get("scenario")),
+            record["status"],
+        )
+        if len(self.buffer) >= FLUSH_BYTES:
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            os.write(self.fd, bytes(self.buffer))
+            self.buffer.clear()
+
+    def close(self):
+        self.flush()
+        os.close(self.fd)
+        self.strings.close()
+
+
+class BinaryTraceReader:
+    """Memory-mapped reader: filters and percentiles without decoding the whole file."""
+
+    def __init__(self, path, use_index=True):
+        self.path = path
+        with open(_strings_path(path), encoding="utf-8") as f:
+            self.strings = [json.loads(line) for line in f]
+        self.ids = {text: i for i, text in enumerate(self.strings)}
+        self.file = open(path, "rb")
+        size = os.fstat(self.file.fileno()).st_size
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+        if self.map is not None and self.map[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a binary trace in this format version")
+        # Ignore a torn record at the end left by a writer that was killed mid-append
+        body = max(size - len(MAGIC), 0)
+        self.end = len(MAGIC) + body // RECORD.size * RECORD.size
+        self.index = self._load_index() if use_index and len(self) else None
+
+    def _first_ts(self):
+        return RECORD.unpack_from(self.map, len(MAGIC))[0]
+
+    def _load_index(self):
+        """Read the index sidecar, extend it over records appended since, and save it back."""
+        chunks = []
+        try:
+            with open(_index_path(self.path), encoding="utf-8") as f:
+                saved = json.load(f)
+            indexed = sum(chunk["records"] for chunk in saved["chunks"])
+            # Reuse it only if it describes a prefix of this very file
+            if saved["chunk"] == INDEX_CHUNK and saved["first_ts"] == self._first_ts() and indexed <= len(self):
+                # Bitmaps are saved as hex: JSON ints that long exceed Python's str conversion limit
+                chunks = [dict(chunk, methods=int(chunk["methods"], 16), templates=int(chunk["templates"], 16))
+                          for chunk in saved["chunks"]]
+        except (OSError, ValueError, KeyError):
+            pass
+        if sum(chunk["records"] for chunk in chunks) == len(self):
+            return chunks
+        if chunks and chunks[-1]["records"] < INDEX_CHUNK:
+            chunks.pop()  # The trace has grown since this partial chunk was summarized
+
+        for offset in range(len(MAGIC) + len(chunks) * SCAN_BYTES, self.end, SCAN_BYTES):
+            chunks.append(_index_chunk(self.map[offset:min(offset + SCAN_BYTES, self.end)]))
+        try:
+            temp = f"{_index_path(self.path)}.{os.getpid()}.tmp"
+            with open(temp, "w", encoding="utf-8") as f:
+                json.dump({"chunk": INDEX_CHUNK, "first_ts": self._first_ts(),
+                           "chunks": [dict(chunk, methods=hex(chunk["methods"]), templates=hex(chunk["templates"]))
+                                      for chunk in chunks]}, f)
+            os.replace(temp, _index_path(self.path))
+        except OSError:
+            pass  # Read-only location: the index still serves this reader
+        return chunks
+
+    def _chunk_may_match(self, chunk, method_id, template_id, status, since, until):
+        return ((method_id is None or chunk["methods"] >> method_id & 1)
+                and (template_id is None or chunk["templates"] >> template_id & 1)
+                and (status is None or status in chunk["statuses"])
+                and (since is None or chunk["max_ts"] >= since)
+                and (until is None or chunk["min_ts"] < until))
+
+    def __len__(self):
+        return max(self.end - len(MAGIC), 0) // RECORD.size
+
+    def close(self):
+        if self.map is not None:
+            self.map.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _string(self, string_id):
+        return None if string_id == NO_STRING else self.strings[string_id]
+
+    def _rows(self, method=None, template=None, status=None, since=None, until=None):
+        """Yield raw record tuples matching the filters, comparing interned ids only."""
+        if not len(self):
+            return
+        method_id = self.ids.get(method, -1) if method else None
+        template_id = self.ids.get(template, -1) if template else None
+        if method_id == -1 or template_id == -1:
+            return  # Never interned, so no record can match
+        # Unpack a bounded slice at a time: memory stays flat and no buffer export
+        # outlives a half-consumed generator (which would block closing the map)
+        for chunk_number, offset in enumerate(range(len(MAGIC), self.end, SCAN_BYTES)):
+            if (self.index is not None
+                    and not self._chunk_may_match(self.index[chunk_number], method_id, template_id, status, since, until)):
+                continue
+            for row in RECORD.iter_unpack(self.map[offset:min(offset + SCAN_BYTES, self.end)]):
+                ts, _, row_method, row_template, _, _, row_status = row
+                if ((method_id is None or row_method == method_id)
+                        and (template_id is None or row_template == template_id)
+                        and (status is None or row_status == status)
+                        and (since is None or ts >= since)
+                        and (until is None or ts < until)):
+                    yield row
+
+    def records(self, **filters):
+        """Yield matching records as dicts with the same keys as the JSONL trace."""
+        for ts, elapsed, method, template, path, scenario, status in self._rows(**filters):
+            yield {
+                "ts": ts,
+                "method": self.strings[method],
+                "path": self.strings[path],
+                "template": self.strings[template],
+                "status": status,
+                "elapsed_ms": elapsed,
+                "scenario": self._string(scenario),
+            }
+
+    def endpoint_percentiles(self, pcts=(50, 95, 99), **filters):
+        """Per "METHOD /template" count, errors (no response or 5xx) and latency percentiles."""
+        latencies = {}
+        for _, elapsed, method, template, _, _, status in self._rows(**filters):
+            values, errors = latencies.setdefault((method, template), ([], [0]))
+            values.append(elapsed)
+            errors[0] += status == 0 or status >= 500
+        summary = {}
+        for (method, template), (values, errors) in sorted(latencies.items()):
+            values.sort()
+            summary[f"{self.strings[method]} {self.strings[template]}"] = dict(
+                count=len(values), errors=errors[0], **{f"p{p}_ms": percentile(values, p) for p in pcts})
+        return summary
+
+
+def read_binary_trace(path):
+    """Yield every record of a binary trace as a dict."""
+    with BinaryTraceReader(path) as reader:
+        yield from reader.records()
+
+
+def jsonl_to_binary(src, dst):
+    """Convert a JSONL trace to the binary format; returns the record count."""
+    writer = BinaryTraceWriter(dst)
+    count = 0
+    try:
+        with open(src, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    writer.write(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+                count += 1
+    finally:
+        writer.close()
+    BinaryTraceReader(dst).close()  # Opening a reader writes the sparse index
+    return count
+
+
+def binary_to_jsonl(src, dst):
+    """Convert a binary trace back to JSONL; returns the record count."""
+    count = 0
+    with open(dst, "w", encoding="utf-8") as out:
+        for record in read_binary_trace(src):
+            out.write(json.dumps(record) + "\n")
+            count += 1
+    return count
+
+
+def parse_endpoint(text):
+    """Split "GET /todos/:id" or "/todos/:id" into (method, template)."""
+    method, _, template = text.rpartition(" ")
+    return (method.upper() or None), template
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert and query binary HTTP traces.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    convert = commands.add_parser("convert", help="convert between JSONL and binary (direction from the source)")
+    convert.add_argument("src")
+    convert.add_argument("dst")
+
+    query = commands.add_parser("query", help="per-endpoint latency percentiles over a binary trace")
+    query.add_argument("trace")
+    query.add_argument("--endpoint", help='"METHOD /template" or "/template", e.g. "GET /todos/:id"')
+    query.add_argument("--status", type=int)
+    query.add_argument("--since", type=float, help="only requests started at or after this epoch time")
+    query.add_argument("--until", type=float, help="only requests started before this epoch time")
+    query.add_argument("--percentiles", default="50,95,99", help="comma-separated (default: 50,95,99)")
+    args = parser.parse_args(argv)
+
+    if args.command == "convert":
+        if is_binary_trace(args.src):
+            count = binary_to_jsonl(args.src, args.dst)
+        else:
+            count = jsonl_to_binary(args.src, args.dst)
+        print(f"Converted {count} records to {args.dst}")
+        return
+
+    method, template = parse_endpoint(args.endpoint) if args.endpoint else (None, None)
+    pcts = [int(p) for p in args.percentiles.split(",")]
+    with BinaryTraceReader(args.trace) as reader:
+        summary = reader.endpoint_percentiles(pcts, method=method, template=template, status=args.status,
+                                              since=args.since, until=args.until)
+        print(f"\n {len(reader)} records in {args.trace}\n")
+    for endpoint, stats in summary.items():
+        columns = "  ".join(f"p{p} {stats[f'p{p}_ms']:8.2f} ms" for p in pcts)
+        print(f"  {endpoint:45} {stats['count']:>8}  {columns}")
+
+
+if __name__ == "__main__":
+    main()